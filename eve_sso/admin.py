@@ -21,5 +21,6 @@ class AccessTokenAdmin(admin.ModelAdmin):
 
     get_scopes.short_description = 'Scopes'
 
-    list_display = ('user', 'character_name', 'get_scopes')
+    list_display = ('user', 'character_name', 'get_scopes', 'invalidated', 'invalid_reason')
+    list_filter = ('invalid_reason',)
     search_fields = ['user__%s' % User.USERNAME_FIELD, 'character_name', 'scopes__name']
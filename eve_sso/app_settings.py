@@ -5,3 +5,12 @@ EVE_SSO_CLIENT_ID = getattr(settings, 'EVE_SSO_CLIENT_ID')
 EVE_SSO_CLIENT_SECRET = getattr(settings, 'EVE_SSO_CLIENT_SECRET')
 EVE_SSO_CALLBACK_URL = getattr(settings, 'EVE_SSO_CALLBACK_URL')
 EVE_SSO_TOKEN_VALID_DURATION = int(getattr(settings, 'EVE_SSO_TOKEN_VALID_DURATION', 1200))
+EVE_SSO_INVALID_TOKEN_MAX_AGE = int(getattr(settings, 'EVE_SSO_INVALID_TOKEN_MAX_AGE', 60 * 60 * 24 * 30))
+EVE_SSO_INVALID_TOKEN_PURGE_BATCH_SIZE = int(getattr(settings, 'EVE_SSO_INVALID_TOKEN_PURGE_BATCH_SIZE', 500))
+EVE_SSO_INVALID_TOKEN_PURGE_MAX_BATCHES = int(getattr(settings, 'EVE_SSO_INVALID_TOKEN_PURGE_MAX_BATCHES', 20))
+EVE_SSO_INVALID_TOKEN_PURGE_BATCH_DELAY = float(getattr(settings, 'EVE_SSO_INVALID_TOKEN_PURGE_BATCH_DELAY', 1.0))
+EVE_SSO_PROFILING_SAMPLE_RATE = float(getattr(settings, 'EVE_SSO_PROFILING_SAMPLE_RATE', 0.01))
+EVE_SSO_PROFILING_SERVER_TIMING = bool(getattr(settings, 'EVE_SSO_PROFILING_SERVER_TIMING', False))
+EVE_SSO_PROFILING_WINDOW = int(getattr(settings, 'EVE_SSO_PROFILING_WINDOW', 1000))
+EVE_SSO_PROFILING_LOG_EVERY = int(getattr(settings, 'EVE_SSO_PROFILING_LOG_EVERY', 100))
+EVE_SSO_PROFILING_LOG_TOP = int(getattr(settings, 'EVE_SSO_PROFILING_LOG_TOP', 10))
@@ -3,6 +3,7 @@ from functools import wraps
 from django.utils.decorators import available_attrs
 from django.utils.six import string_types
 from eve_sso.models import AccessToken, CallbackRedirect, TokenError
+from eve_sso.profiling import timed, SSO_SESSION
 
 import logging
 
@@ -26,8 +27,9 @@ def token_required(scopes=[], new=False):
         @wraps(view_func, assigned=available_attrs(view_func))
         def _wrapped_view(request, *args, **kwargs):
             # ensure session installed in database
-            if not request.session.exists(request.session.session_key):
-                request.session.create()
+            with timed(SSO_SESSION):
+                if not request.session.exists(request.session.session_key):
+                    request.session.create()
 
             # clean up callback redirect, pass token if new requested
             try:
@@ -46,12 +48,12 @@ def token_required(scopes=[], new=False):
                     return redirect_to_login(request.get_full_path())
 
                 # collect tokens in db, check if still valid, return if any
-                for t in AccessToken.objects.filter(user__pk=request.user.pk).filter(scopes__name__in=scopes):
+                for t in AccessToken.objects.valid().filter(user__pk=request.user.pk).filter(scopes__name__in=scopes):
                     try:
                         t.token
-                    except TokenError:
-                        t.delete()
-                tokens = AccessToken.objects.filter(user__pk=request.user.pk).filter(scopes__name__in=scopes)
+                    except TokenError as e:
+                        t.invalidate(e.reason)
+                tokens = AccessToken.objects.valid().filter(user__pk=request.user.pk).filter(scopes__name__in=scopes)
                 if tokens.exists():
                     return view_func(request, tokens, *args, **kwargs)
 
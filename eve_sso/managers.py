@@ -26,3 +26,24 @@ class CallbackRedirectManager(models.Manager):
             hash_string = model.generate_hash(session_key, salt)
         assert hash_string == model.generate_hash(session_key, salt)
         return super(CallbackRedirectManager, self).create(salt=salt, hash_string=hash_string, *args, **kwargs)
+
+
+class AccessTokenQuerySet(models.QuerySet):
+    def valid(self):
+        """
+        Excludes :model:`eve_sso.AccessToken` instances which have been invalidated.
+        """
+        return self.filter(invalidated__isnull=True)
+
+    def invalid(self):
+        """
+        Restricts to :model:`eve_sso.AccessToken` instances which have been invalidated.
+        """
+        return self.filter(invalidated__isnull=False)
+
+
+class AccessTokenManager(models.Manager.from_queryset(AccessTokenQuerySet)):
+    """
+    Provides filtering of :model:`eve_sso.AccessToken` instances by validity.
+    """
+    pass
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+INDEX_NAME = 'eve_sso_accesstoken_valid_user_id'
+
+
+def create_valid_index(apps, schema_editor):
+    # partial indexes are only supported by some backends; others fall back to the invalidated field index
+    if schema_editor.connection.vendor in ['postgresql', 'sqlite']:
+        schema_editor.execute(
+            'CREATE INDEX %s ON eve_sso_accesstoken (user_id) WHERE invalidated IS NULL' % INDEX_NAME
+        )
+
+
+def drop_valid_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ['postgresql', 'sqlite']:
+        schema_editor.execute('DROP INDEX IF EXISTS %s' % INDEX_NAME)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eve_sso', '0002_scopes_20160501_2301'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accesstoken',
+            name='invalidated',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='When this token was found to be unusable. Invalid tokens are kept as a record until purged.', null=True),
+        ),
+        migrations.AddField(
+            model_name='accesstoken',
+            name='invalid_reason',
+            field=models.CharField(blank=True, choices=[('error', 'Error'), ('invalid', 'Invalid'), ('expired', 'Expired'), ('not_refreshable', 'Not Refreshable')], help_text='Why this token was found to be unusable.', max_length=20),
+        ),
+        migrations.RunPython(create_valid_index, drop_valid_index),
+    ]
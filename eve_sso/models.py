@@ -9,23 +9,24 @@ import base64
 import uuid
 import hashlib
 import datetime
-from eve_sso.managers import CallbackRedirectManager
+from eve_sso.managers import CallbackRedirectManager, AccessTokenManager
+from eve_sso.profiling import timed, SSO_HTTP, SSO_SESSION
 
 
 class TokenError(Exception):
-    pass
+    reason = 'error'
 
 
 class TokenInvalidError(TokenError):
-    pass
+    reason = 'invalid'
 
 
 class TokenExpiredError(TokenError):
-    pass
+    reason = 'expired'
 
 
 class NotRefreshableTokenError(TokenError):
-    pass
+    reason = 'not_refreshable'
 
 
 def generate_auth_string():
@@ -74,14 +75,16 @@ class CallbackCode(models.Model):
             'grant_type': 'authorization_code',
             'code': self.code,
         }
-        r = requests.post(self.CODE_EXCHANGE_URL, headers=custom_headers, json=data)
+        with timed(SSO_HTTP):
+            r = requests.post(self.CODE_EXCHANGE_URL, headers=custom_headers, json=data)
         r.raise_for_status()
         access_token = r.json()['access_token']
         refresh_token = r.json()['refresh_token']
 
         custom_headers = {'Authorization': 'Bearer ' + access_token}
 
-        r = requests.get(self.TOKEN_EXCHANGE_URL, headers=custom_headers)
+        with timed(SSO_HTTP):
+            r = requests.get(self.TOKEN_EXCHANGE_URL, headers=custom_headers)
         if r.status_code == 403:
             raise TokenInvalidError()
         r.raise_for_status()
@@ -110,6 +113,12 @@ class AccessToken(models.Model):
     """
     TOKEN_REFRESH_URL = "https://login.eveonline.com/oauth/token"
     TOKEN_REFRESH_GRANT_TYPE = 'refresh_token'
+    INVALID_REASON_CHOICES = (
+        (TokenError.reason, 'Error'),
+        (TokenInvalidError.reason, 'Invalid'),
+        (TokenExpiredError.reason, 'Expired'),
+        (NotRefreshableTokenError.reason, 'Not Refreshable'),
+    )
 
     created = models.DateTimeField(auto_now_add=True)
     access_token = models.CharField(max_length=254, unique=True, help_text="The access token granted by SSO.")
@@ -127,10 +136,24 @@ class AccessToken(models.Model):
                                             help_text="The unique string identifying this character and its owning EVE "
                                                       "account. Changes if the owning account changes.")
     scopes = models.ManyToManyField(Scope, blank=True, help_text="The access scopes granted by this SSO token.")
+    invalidated = models.DateTimeField(blank=True, null=True, db_index=True,
+                                       help_text="When this token was found to be unusable. Invalid tokens are kept "
+                                                 "as a record until purged.")
+    invalid_reason = models.CharField(max_length=20, blank=True, choices=INVALID_REASON_CHOICES,
+                                      help_text="Why this token was found to be unusable.")
+
+    objects = AccessTokenManager()
 
     def __str__(self):
         return "%s - %s" % (self.character_name, ", ".join([s.name for s in self.scopes.all()]))
 
+    @property
+    def valid(self):
+        """
+        Determines if this token has not been invalidated.
+        """
+        return self.invalidated is None
+
     @property
     def can_refresh(self):
         """
@@ -156,6 +179,8 @@ class AccessToken(models.Model):
         """
         Returns the access token. If expired, automatically refreshes.
         """
+        if not self.valid:
+            raise TokenInvalidError()
         if self.expired:
             if self.can_refresh:
                 self.refresh()
@@ -176,7 +201,8 @@ class AccessToken(models.Model):
                 'grant_type': self.TOKEN_REFRESH_GRANT_TYPE,
                 'refresh_token': self.refresh_token,
             }
-            r = requests.post(self.TOKEN_REFRESH_URL, params=params, headers=custom_headers)
+            with timed(SSO_HTTP):
+                r = requests.post(self.TOKEN_REFRESH_URL, params=params, headers=custom_headers)
             if r.status_code in [400, 403]:
                 raise TokenInvalidError()
             r.raise_for_status()
@@ -186,6 +212,18 @@ class AccessToken(models.Model):
         else:
             raise NotRefreshableTokenError()
 
+    def invalidate(self, reason=TokenError.reason):
+        """
+        Marks this token as unusable instead of deleting it.
+        Accepts a reason, typically the reason attribute of the raised TokenError.
+        Does nothing if already invalid, preserving the original reason and time.
+        """
+        if not self.valid:
+            return
+        self.invalidated = timezone.now()
+        self.invalid_reason = reason
+        self.save(update_fields=['invalidated', 'invalid_reason'])
+
 
 @python_2_unicode_compatible
 class CallbackRedirect(models.Model):
@@ -229,9 +267,10 @@ class CallbackRedirect(models.Model):
         """
         if not self.hash_string or not self.salt:
             raise AttributeError("Model is not yet populated.")
-        if not request.session.exists(request.session.session_key):
-            # install session in database
-            request.session.create()
+        with timed(SSO_SESSION):
+            if not request.session.exists(request.session.session_key):
+                # install session in database
+                request.session.create()
         req_hash = self.generate_hash(request.session.session_key, self.salt)
         state = request.GET.get('state', None)
         if req_hash == state:
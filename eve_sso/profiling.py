@@ -0,0 +1,215 @@
+from __future__ import unicode_literals
+from collections import deque
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+from eve_sso.app_settings import EVE_SSO_PROFILING_SAMPLE_RATE, EVE_SSO_PROFILING_SERVER_TIMING, \
+    EVE_SSO_PROFILING_WINDOW, EVE_SSO_PROFILING_LOG_EVERY, EVE_SSO_PROFILING_LOG_TOP
+import random
+import threading
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+SSO_HTTP = 'sso-http'
+SSO_DB = 'sso-db'
+SSO_SESSION = 'sso-session'
+CATEGORIES = (SSO_HTTP, SSO_DB, SSO_SESSION)
+
+DB_TABLE_PREFIX = 'eve_sso_'
+
+_local = threading.local()
+_samples = deque(maxlen=EVE_SSO_PROFILING_WINDOW)
+_sample_count = [0]
+_sample_lock = threading.Lock()
+
+
+class SSOProfile(object):
+    """
+    Accumulates time spent on SSO work, in seconds, and call counts per category.
+    Costs are also added to the enclosing profile, if any.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.durations = dict((c, 0.0) for c in CATEGORIES)
+        self.counts = dict((c, 0) for c in CATEGORIES)
+
+    def add(self, category, duration, count=1):
+        self.durations[category] += duration
+        self.counts[category] += count
+        if self.parent is not None:
+            self.parent.add(category, duration, count=count)
+
+    @property
+    def empty(self):
+        return not any(self.counts.values())
+
+    @property
+    def total(self):
+        return sum(self.durations.values())
+
+    def server_timing(self):
+        """
+        Formats the recorded durations as a Server-Timing header value.
+        """
+        return ', '.join('%s;dur=%.1f' % (c, self.durations[c] * 1000) for c in CATEGORIES)
+
+
+def current_profile():
+    """
+    Returns the active :class:`SSOProfile` for this thread, or None if not profiling.
+    """
+    return getattr(_local, 'profile', None)
+
+
+@contextmanager
+def timed(category):
+    """
+    Attributes the time spent in this block to the given category of the active profile.
+    Does nothing if no profile is active.
+    """
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+    start = time.time()
+    try:
+        yield
+    finally:
+        profile.add(category, time.time() - start)
+
+
+@contextmanager
+def profile_sso():
+    """
+    Collects SSO costs incurred within this block. Yields the :class:`SSOProfile`.
+    ORM queries are attributed when they touch eve_sso tables, on any database alias.
+    Blocks may be nested; costs of an inner block also count towards the outer one.
+    """
+    previous = current_profile()
+    profile = SSOProfile(parent=previous)
+    _local.profile = profile
+    # log queries into a fresh deque per connection so a full or shared log cannot hide them
+    saved = []
+    for conn in connections.all():
+        saved.append((conn, conn.force_debug_cursor, conn.queries_log))
+        conn.force_debug_cursor = True
+        conn.queries_log = deque(maxlen=conn.queries_limit)
+    try:
+        yield profile
+    finally:
+        queries = []
+        for conn, force_debug_cursor, queries_log in saved:
+            queries.extend(conn.queries_log)
+            # hand the queries back so enclosing profiles and DEBUG logging still see them
+            queries_log.extend(conn.queries_log)
+            conn.queries_log = queries_log
+            conn.force_debug_cursor = force_debug_cursor
+        _local.profile = previous
+        for q in queries:
+            if DB_TABLE_PREFIX in q['sql']:
+                # credited directly to this profile; the parent reads the queries from its own log
+                profile.durations[SSO_DB] += float(q['time'])
+                profile.counts[SSO_DB] += 1
+
+
+def record(name, profile):
+    """
+    Adds a profile to the rolling report under the given name.
+    Logs the report every EVE_SSO_PROFILING_LOG_EVERY recorded profiles.
+    """
+    _samples.append((name, profile.durations.copy(), profile.counts.copy()))
+    if EVE_SSO_PROFILING_LOG_EVERY:
+        with _sample_lock:
+            _sample_count[0] += 1
+            log_now = _sample_count[0] % EVE_SSO_PROFILING_LOG_EVERY == 0
+        if log_now:
+            log_report()
+
+
+def report(top=10):
+    """
+    Aggregates the rolling window of recorded profiles by name.
+    Returns the top entries by total SSO time as a list of dicts.
+    """
+    entries = {}
+    for name, durations, counts in list(_samples):
+        entry = entries.setdefault(name, {
+            'name': name,
+            'requests': 0,
+            'total': 0.0,
+            'durations': dict((c, 0.0) for c in CATEGORIES),
+            'counts': dict((c, 0) for c in CATEGORIES),
+        })
+        entry['requests'] += 1
+        for c in CATEGORIES:
+            entry['durations'][c] += durations[c]
+            entry['counts'][c] += counts[c]
+            entry['total'] += durations[c]
+    return sorted(entries.values(), key=lambda e: e['total'], reverse=True)[:top]
+
+
+def log_report(top=EVE_SSO_PROFILING_LOG_TOP):
+    """
+    Logs the top entries of the rolling report at INFO level.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    for entry in report(top=top):
+        durations, counts = entry['durations'], entry['counts']
+        logger.info("SSO cost for %s over %s requests: total %.1fms, %s %.1fms/%s, %s %.1fms/%s, %s %.1fms/%s",
+                    entry['name'], entry['requests'], entry['total'] * 1000,
+                    SSO_HTTP, durations[SSO_HTTP] * 1000, counts[SSO_HTTP],
+                    SSO_DB, durations[SSO_DB] * 1000, counts[SSO_DB],
+                    SSO_SESSION, durations[SSO_SESSION] * 1000, counts[SSO_SESSION])
+
+
+def reset():
+    """
+    Clears the rolling report.
+    """
+    _samples.clear()
+
+
+class SSOProfilingMiddleware(MiddlewareMixin):
+    """
+    Profiles a sample of requests for SSO costs and records them to the rolling report.
+    If enabled, adds a Server-Timing header to sampled responses which incurred SSO costs,
+    only for staff users unless DEBUG is on.
+    """
+
+    def process_request(self, request):
+        if EVE_SSO_PROFILING_SAMPLE_RATE >= 1 or random.random() < EVE_SSO_PROFILING_SAMPLE_RATE:
+            request._sso_profile_context = profile_sso()
+            request._sso_profile = request._sso_profile_context.__enter__()
+
+    def process_response(self, request, response):
+        context = getattr(request, '_sso_profile_context', None)
+        if context is None:
+            return response
+        context.__exit__(None, None, None)
+        del request._sso_profile_context
+        profile = request._sso_profile
+
+        if profile.empty:
+            return response
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        name = resolver_match.view_name if resolver_match else request.path
+        record(name, profile)
+
+        if EVE_SSO_PROFILING_SERVER_TIMING and (settings.DEBUG or self._is_staff(request)):
+            if response.has_header('Server-Timing'):
+                response['Server-Timing'] = '%s, %s' % (response['Server-Timing'], profile.server_timing())
+            else:
+                response['Server-Timing'] = profile.server_timing()
+        return response
+
+    @staticmethod
+    def _is_staff(request):
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_staff)
@@ -2,7 +2,10 @@ from __future__ import unicode_literals
 from celery.task import periodic_task
 from django.utils import timezone
 from datetime import timedelta
-from eve_sso.models import CallbackRedirect, CallbackCode, AccessToken, TokenError
+import time
+from eve_sso.models import CallbackRedirect, CallbackCode, AccessToken, TokenError, NotRefreshableTokenError
+from eve_sso.app_settings import EVE_SSO_INVALID_TOKEN_MAX_AGE, EVE_SSO_INVALID_TOKEN_PURGE_BATCH_SIZE, \
+    EVE_SSO_INVALID_TOKEN_PURGE_MAX_BATCHES, EVE_SSO_INVALID_TOKEN_PURGE_BATCH_DELAY
 
 
 @periodic_task(run_every=timedelta(hours=4))
@@ -28,14 +31,35 @@ def cleanup_callbackcode(max_age=300):
 @periodic_task(run_every=timedelta(days=1))
 def cleanup_accesstoken():
     """
-    Delete expired :model:`eve_sso.AccessToken` models.
+    Invalidate expired :model:`eve_sso.AccessToken` models which cannot be refreshed.
     """
-    for model in AccessToken.objects.all():
+    for model in AccessToken.objects.valid():
         if model.expired:
             if model.can_refresh:
                 try:
                     model.refresh()
-                except TokenError:
-                    model.delete()
+                except TokenError as e:
+                    model.invalidate(e.reason)
             else:
-                model.delete()
+                model.invalidate(NotRefreshableTokenError.reason)
+
+
+@periodic_task(run_every=timedelta(hours=6))
+def purge_invalid_accesstoken(max_age=EVE_SSO_INVALID_TOKEN_MAX_AGE, batch_size=EVE_SSO_INVALID_TOKEN_PURGE_BATCH_SIZE,
+                              max_batches=EVE_SSO_INVALID_TOKEN_PURGE_MAX_BATCHES,
+                              batch_delay=EVE_SSO_INVALID_TOKEN_PURGE_BATCH_DELAY):
+    """
+    Delete old invalidated :model:`eve_sso.AccessToken` models.
+    Accepts a max_age parameter, in seconds (default 30 days).
+    Deletes at most max_batches batches of batch_size models per run; any remainder is left for the next run.
+    Sleeps batch_delay seconds between batches to spread out the cascading deletes.
+    """
+    max_age_obj = timedelta(seconds=max_age)
+    qs = AccessToken.objects.invalid().filter(invalidated__lte=timezone.now() - max_age_obj)
+    for i in range(max_batches):
+        pks = list(qs.order_by('invalidated').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        if i and batch_delay:
+            time.sleep(batch_delay)
+        AccessToken.objects.filter(pk__in=pks).delete()
@@ -1,3 +1,272 @@
-from django.test import TestCase
+from __future__ import unicode_literals
+from django.db import connection
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory
+from django.utils import timezone
+from datetime import timedelta
+from eve_sso.decorators import token_required
+from eve_sso.models import AccessToken, Scope, TokenError, TokenInvalidError, TokenExpiredError, \
+    NotRefreshableTokenError
+from eve_sso.tasks import purge_invalid_accesstoken, cleanup_accesstoken
+from eve_sso import profiling
 
-# Create your tests here.
+try:
+    from unittest import mock
+except ImportError:  # py2
+    import mock
+
+
+def expire(token):
+    AccessToken.objects.filter(pk=token.pk).update(created=timezone.now() - timedelta(days=1))
+    token.refresh_from_db()
+
+
+def rejected_refresh(*args, **kwargs):
+    return mock.Mock(status_code=400)
+
+
+def create_token(n, **kwargs):
+    kwargs.setdefault('refresh_token', 'refresh%s' % n)
+    return AccessToken.objects.create(
+        access_token='access%s' % n,
+        character_id=n,
+        character_name='Character %s' % n,
+        character_owner_hash='hash%s' % n,
+        **kwargs
+    )
+
+
+class AccessTokenInvalidationTestCase(TestCase):
+    def setUp(self):
+        self.token = create_token(1)
+
+    def test_invalidate(self):
+        self.assertTrue(self.token.valid)
+        self.token.invalidate(TokenExpiredError.reason)
+        self.token.refresh_from_db()
+        self.assertFalse(self.token.valid)
+        self.assertIsNotNone(self.token.invalidated)
+        self.assertEqual(self.token.invalid_reason, TokenExpiredError.reason)
+
+    def test_invalidate_default_reason(self):
+        self.token.invalidate()
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.invalid_reason, TokenError.reason)
+
+    def test_invalidate_preserves_original(self):
+        self.token.invalidate(TokenExpiredError.reason)
+        self.token.refresh_from_db()
+        invalidated = self.token.invalidated
+        self.token.invalidate(TokenInvalidError.reason)
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.invalidated, invalidated)
+        self.assertEqual(self.token.invalid_reason, TokenExpiredError.reason)
+
+    def test_valid_invalid_querysets(self):
+        other = create_token(2)
+        other.invalidate()
+        self.assertEqual(list(AccessToken.objects.valid()), [self.token])
+        self.assertEqual(list(AccessToken.objects.invalid()), [other])
+
+    def test_token_raises_when_invalidated(self):
+        self.assertEqual(self.token.token, 'access1')
+        self.token.invalidate()
+        with self.assertRaises(TokenInvalidError):
+            self.token.token
+
+
+class CleanupAccessTokenTestCase(TestCase):
+    @mock.patch('eve_sso.models.requests.post', side_effect=rejected_refresh)
+    def test_invalidates_rejected_refresh(self, post):
+        token = create_token(1)
+        expire(token)
+        cleanup_accesstoken()
+        token.refresh_from_db()
+        self.assertTrue(post.called)
+        self.assertEqual(token.invalid_reason, TokenInvalidError.reason)
+
+    def test_invalidates_not_refreshable(self):
+        token = create_token(1, refresh_token=None)
+        expire(token)
+        cleanup_accesstoken()
+        token.refresh_from_db()
+        self.assertEqual(token.invalid_reason, NotRefreshableTokenError.reason)
+
+    def test_ignores_unexpired(self):
+        token = create_token(1)
+        cleanup_accesstoken()
+        token.refresh_from_db()
+        self.assertTrue(token.valid)
+
+
+class TokenRequiredTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('user')
+        self.scope = Scope.objects.get(name='publicData')
+        self.received = []
+
+        @token_required(scopes=self.scope.name)
+        def view(request, tokens):
+            self.received.extend(tokens)
+            return HttpResponse()
+
+        self.view = view
+
+    def create_token(self, n, **kwargs):
+        token = create_token(n, user=self.user, **kwargs)
+        token.scopes.add(self.scope)
+        return token
+
+    def get(self):
+        request = RequestFactory().get('/')
+        request.session = SessionStore()
+        request.user = self.user
+        return self.view(request)
+
+    def test_passes_valid_token(self):
+        token = self.create_token(1)
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.received, [token])
+
+    @mock.patch('eve_sso.models.requests.post', side_effect=rejected_refresh)
+    def test_invalidates_rejected_refresh(self, post):
+        token = self.create_token(1)
+        expire(token)
+        response = self.get()
+        token.refresh_from_db()
+        self.assertEqual(token.invalid_reason, TokenInvalidError.reason)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.received, [])
+
+    def test_skips_invalidated_token(self):
+        invalid = self.create_token(1)
+        invalid.invalidate()
+        token = self.create_token(2)
+        self.get()
+        self.assertEqual(self.received, [token])
+
+
+class PurgeInvalidAccessTokenTestCase(TestCase):
+    def invalidate(self, token, age):
+        token.invalidate()
+        AccessToken.objects.filter(pk=token.pk).update(invalidated=timezone.now() - timedelta(seconds=age))
+
+    def test_respects_max_age(self):
+        old = create_token(1)
+        recent = create_token(2)
+        valid = create_token(3)
+        self.invalidate(old, 1000)
+        self.invalidate(recent, 10)
+        purge_invalid_accesstoken(max_age=100, batch_delay=0)
+        self.assertFalse(AccessToken.objects.filter(pk=old.pk).exists())
+        self.assertTrue(AccessToken.objects.filter(pk=recent.pk).exists())
+        self.assertTrue(AccessToken.objects.filter(pk=valid.pk).exists())
+
+    def test_stops_at_max_batches(self):
+        for n in range(5):
+            self.invalidate(create_token(n), 1000)
+        purge_invalid_accesstoken(max_age=100, batch_size=2, max_batches=2, batch_delay=0)
+        self.assertEqual(AccessToken.objects.invalid().count(), 1)
+        purge_invalid_accesstoken(max_age=100, batch_size=2, max_batches=2, batch_delay=0)
+        self.assertEqual(AccessToken.objects.invalid().count(), 0)
+
+
+class ProfilingTestCase(TestCase):
+    def setUp(self):
+        profiling.reset()
+
+    def test_timed_without_profile(self):
+        self.assertIsNone(profiling.current_profile())
+        with profiling.timed(profiling.SSO_HTTP):
+            pass
+        self.assertIsNone(profiling.current_profile())
+
+    def test_timed_with_profile(self):
+        with profiling.profile_sso() as profile:
+            with profiling.timed(profiling.SSO_HTTP):
+                pass
+        self.assertEqual(profile.counts[profiling.SSO_HTTP], 1)
+        self.assertIsNone(profiling.current_profile())
+
+    def test_nested_profiles(self):
+        with profiling.profile_sso() as outer:
+            with profiling.profile_sso() as inner:
+                with profiling.timed(profiling.SSO_SESSION):
+                    pass
+                create_token(1)
+            self.assertIs(profiling.current_profile(), outer)
+        self.assertEqual(inner.counts[profiling.SSO_SESSION], 1)
+        self.assertEqual(outer.counts[profiling.SSO_SESSION], 1)
+        self.assertEqual(inner.counts[profiling.SSO_DB], outer.counts[profiling.SSO_DB])
+        self.assertGreater(outer.counts[profiling.SSO_DB], 0)
+
+    def test_db_queries_counted_with_full_log(self):
+        self.addCleanup(connection.queries_log.clear)
+        connection.queries_log.extend({'sql': '', 'time': '0'} for _ in range(connection.queries_limit))
+        with profiling.profile_sso() as profile:
+            create_token(1)
+        self.assertGreater(profile.counts[profiling.SSO_DB], 0)
+
+    def test_report_aggregation(self):
+        for name, duration in [('a', 1.0), ('b', 0.5), ('a', 2.0)]:
+            profile = profiling.SSOProfile()
+            profile.add(profiling.SSO_HTTP, duration)
+            profiling.record(name, profile)
+        report = profiling.report()
+        self.assertEqual([e['name'] for e in report], ['a', 'b'])
+        self.assertEqual(report[0]['requests'], 2)
+        self.assertEqual(report[0]['total'], 3.0)
+        self.assertEqual(report[0]['counts'][profiling.SSO_HTTP], 2)
+        self.assertEqual(len(profiling.report(top=1)), 1)
+
+    def test_log_report(self):
+        profile = profiling.SSOProfile()
+        profile.add(profiling.SSO_HTTP, 0.5)
+        profiling.record('a', profile)
+        with mock.patch.object(profiling.logger, 'isEnabledFor', return_value=True), \
+                mock.patch.object(profiling.logger, 'info') as info:
+            profiling.log_report()
+        self.assertEqual(info.call_count, 1)
+        self.assertIn('a', info.call_args[0])
+
+    def sampled_middleware(self, view):
+        sample_rate, server_timing = profiling.EVE_SSO_PROFILING_SAMPLE_RATE, profiling.EVE_SSO_PROFILING_SERVER_TIMING
+        profiling.EVE_SSO_PROFILING_SAMPLE_RATE, profiling.EVE_SSO_PROFILING_SERVER_TIMING = 1, True
+
+        def restore():
+            profiling.EVE_SSO_PROFILING_SAMPLE_RATE, profiling.EVE_SSO_PROFILING_SERVER_TIMING = sample_rate, server_timing
+
+        self.addCleanup(restore)
+        return profiling.SSOProfilingMiddleware(view)
+
+    def test_middleware_skips_empty_profile(self):
+        middleware = self.sampled_middleware(lambda request: HttpResponse())
+        with self.settings(DEBUG=True):
+            response = middleware(RequestFactory().get('/'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(profiling.report(), [])
+
+    def test_middleware_records_sso_costs(self):
+        def view(request):
+            with profiling.timed(profiling.SSO_HTTP):
+                pass
+            return HttpResponse()
+
+        middleware = self.sampled_middleware(view)
+        with self.settings(DEBUG=True):
+            response = middleware(RequestFactory().get('/'))
+        self.assertIn(profiling.SSO_HTTP, response['Server-Timing'])
+        self.assertEqual(profiling.report()[0]['requests'], 1)
+
+    def test_middleware_hides_server_timing_from_anonymous(self):
+        def view(request):
+            with profiling.timed(profiling.SSO_HTTP):
+                pass
+            return HttpResponse()
+
+        middleware = self.sampled_middleware(view)
+        response = middleware(RequestFactory().get('/'))
+        self.assertFalse(response.has_header('Server-Timing'))
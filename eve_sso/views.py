@@ -10,6 +10,7 @@ from eve_sso.app_settings import EVE_SSO_CLIENT_ID, EVE_SSO_CALLBACK_URL
 from django.utils.six import string_types
 from django.core.urlresolvers import reverse
 from eve_sso.models import CallbackCode, CallbackRedirect
+from eve_sso.profiling import timed, SSO_SESSION
 
 EVE_SSO_LOGIN_URL = "https://login.eveonline.com/oauth/authorize/"
 
@@ -35,8 +36,9 @@ def sso_redirect(request, scopes=[], return_to=None):
     CallbackRedirect.objects.filter(session_key=request.session.session_key).delete()
 
     # ensure session installed in database    
-    if not request.session.exists(request.session.session_key):
-        request.session.create()
+    with timed(SSO_SESSION):
+        if not request.session.exists(request.session.session_key):
+            request.session.create()
 
     if return_to:
         url = reverse(return_to)